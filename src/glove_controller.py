@@ -1,4 +1,17 @@
+import asyncio
+import functools
+import logging
+import sys
+import threading
+import time
+import uuid
+
 from bleak import BleakClient, BleakScanner
+from bleak.exc import BleakError
+
+# Messages from the per-command write path go through logging rather than
+# print, so formatting is deferred and debug output costs nothing when disabled.
+logger = logging.getLogger(__name__)
 
 # The address/system ID of the Robotic Glove BLE device.
 DEVICE_ADDRESS = "24A528A5-46FC-C425-02D5-E59445D692C3"
@@ -14,6 +27,218 @@ WRITE_CHARACTERISTIC_UUID = "0000FFE1-0000-1000-8000-00805F9B34FB"
 READ_CHARACTERISTIC_UUID = "0000FFE1-0000-1000-8000-00805F9B34FB"
 
 
+def _normalize_uuid(value: str) -> str:
+    # Expands 16-bit UUIDs with the Bluetooth base UUID, in the lowercase form bleak reports.
+    if len(value) == 4:
+        value = f"0000{value}-0000-1000-8000-00805F9B34FB"
+    return str(uuid.UUID(value))
+
+
+# Normalized forms of the UUIDs above, computed once at import so that
+# comparisons with bleak's UUIDs are plain string equality.
+_UART_SERVICE_UUID = _normalize_uuid(UART_SERVICE_UUID)
+_WRITE_CHARACTERISTIC_UUID = _normalize_uuid(WRITE_CHARACTERISTIC_UUID)
+_READ_CHARACTERISTIC_UUID = _normalize_uuid(READ_CHARACTERISTIC_UUID)
+
+# Pre-encoded "<char><angle>$" command for every servo (A-F) and angle (0-180),
+# indexed as SERVO_TOKENS[servo_index][angle].
+SERVO_TOKENS = [[f"{chr(ord('A') + servo)}{angle}$".encode("ascii") for angle in range(181)]
+                for servo in range(6)]
+
+# Servo indexes that have a command character, for validating set_servo_angle.
+_SERVO_INDICES = frozenset(range(len(SERVO_TOKENS)))
+
+
+def encode_batch(angles) -> bytes:
+    """
+    Encodes a batch command setting all five servos [Thumb, Index, Middle, Ring, Little],
+    e.g. b"A90$B30$C0$D45$E180$", from the pre-encoded tokens.
+    The angles must already be within 0-180.
+    """
+    return b"".join([tokens[angle] for tokens, angle in zip(SERVO_TOKENS, angles)])
+
+
+# ATT_MTU every connection starts with; a single write carries at most MTU - 3 bytes.
+DEFAULT_ATT_MTU = 23
+
+# Written by the keep-alive while the link is idle. A bare terminator
+# carries no servo command.
+KEEPALIVE_COMMAND = b"$"
+
+# Attempts and initial backoff (doubled per retry) for interactive reads and writes.
+RETRY_ATTEMPTS = 3
+RETRY_DELAY = 0.02
+
+# BluetoothGatt.CONNECTION_PRIORITY_HIGH on Android.
+ANDROID_CONNECTION_PRIORITY_HIGH = 1
+
+
+def _split_payload(payload: bytes, limit: int) -> list[bytes]:
+    """
+    Splits a payload into writes of at most limit bytes, breaking after '$'
+    terminators so that no command is split across two writes.
+    """
+    parts = []
+    while len(payload) > limit:
+        cut = payload.rfind(b"$", 0, limit) + 1
+        if cut == 0:
+            # A single command longer than the limit; it has to be split.
+            cut = limit
+        parts.append(payload[:cut])
+        payload = payload[cut:]
+    if payload:
+        parts.append(payload)
+    return parts
+
+
+def run_event_loop(main):
+    """
+    Runs the main coroutine with asyncio.run, on uvloop when it is installed.
+    uvloop is POSIX-only and lowers the per-callback overhead of the loop.
+    """
+    if sys.platform != "win32":
+        try:
+            import uvloop
+        except ImportError:
+            uvloop = None
+
+        if uvloop is not None:
+            if sys.version_info >= (3, 12):
+                return asyncio.run(main, loop_factory=uvloop.new_event_loop)
+            uvloop.install()
+
+    return asyncio.run(main)
+
+
+# A single scanner is shared by all lookups and kept running, instead of
+# starting a fresh scan (a D-Bus StartDiscovery/StopDiscovery on BlueZ) for
+# every lookup. Its callback records every named device it sees, so a repeat
+# lookup is a dict hit.
+_scanner = None
+# name -> (BLEDevice, monotonic time it was last seen)
+_discovered_devices = {}
+# name -> Event set when a device with that name is first seen
+_discovery_waiters = {}
+_prune_task = None
+
+# Discovered devices not seen for DISCOVERY_TTL seconds are dropped, checked
+# every DISCOVERY_PRUNE_INTERVAL seconds, so the cache doesn't grow without
+# bound over a long run.
+DISCOVERY_TTL = 60.0
+DISCOVERY_PRUNE_INTERVAL = 30.0
+
+
+def _on_detection(device, advertisement_data):
+    name = advertisement_data.local_name or device.name
+    if not name:
+        return
+    _discovered_devices[name] = (device, time.monotonic())
+    waiter = _discovery_waiters.get(name)
+    if waiter:
+        waiter.set()
+
+
+def _get_discovered(name):
+    entry = _discovered_devices.get(name)
+    if entry is None:
+        return None
+    device, seen_at = entry
+    if time.monotonic() - seen_at > DISCOVERY_TTL:
+        del _discovered_devices[name]
+        return None
+    return device
+
+
+def _prune_discovered():
+    cutoff = time.monotonic() - DISCOVERY_TTL
+    for name in [name for name, (_, seen_at) in _discovered_devices.items() if seen_at < cutoff]:
+        del _discovered_devices[name]
+
+
+async def _prune_discovered_periodically():
+    while True:
+        await asyncio.sleep(DISCOVERY_PRUNE_INTERVAL)
+        _prune_discovered()
+
+
+async def _stop_scanner(scanner):
+    try:
+        await scanner.stop()
+    except Exception as e:
+        print(f"Error stopping scanner: {e}")
+
+
+async def _start_shared_scanner():
+    global _scanner, _prune_task
+    if _scanner is not None:
+        return
+
+    # Publish the scanner before starting it, so a concurrent lookup doesn't
+    # start a second one and stop_discovery() sees one that is starting up.
+    scanner = _scanner = BleakScanner(detection_callback=_on_detection)
+    try:
+        await scanner.start()
+    except BaseException:
+        # Also on cancellation, e.g. when a direct connection won the race;
+        # the scan may already be running.
+        if _scanner is scanner:
+            _scanner = None
+        await _stop_scanner(scanner)
+        raise
+
+    if _scanner is not scanner:
+        # stop_discovery() ran while the scanner was starting.
+        await _stop_scanner(scanner)
+        return
+    _prune_task = asyncio.create_task(_prune_discovered_periodically())
+
+
+async def _retry(coro_factory, attempts: int = RETRY_ATTEMPTS, delay: float = RETRY_DELAY):
+    """
+    Awaits coro_factory(), retrying transient BLE failures with exponential
+    backoff (20, 40, 80 ms, ...). The last failure is re-raised.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return await coro_factory()
+        except (BleakError, asyncio.TimeoutError) as e:
+            if attempt == attempts:
+                raise
+            logger.debug("BLE operation failed (%s), retrying in %.0f ms", e, delay * 1000)
+            await asyncio.sleep(delay)
+            delay *= 2
+
+
+async def async_input(prompt: str = "") -> str:
+    """
+    Reads a line from stdin without blocking the event loop, so BLE
+    notifications and writes keep being serviced while waiting for the user.
+    The read runs in a daemon thread so that a pending prompt doesn't keep the
+    process alive after Ctrl+C.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(result, error):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def read_line():
+        try:
+            line = input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(resolve, None, e)
+        else:
+            loop.call_soon_threadsafe(resolve, line, None)
+
+    threading.Thread(target=read_line, daemon=True).start()
+    return await future
+
+
 # Asynchronous RoboticGloveController Class
 class RoboticGloveController:
     def __init__(self, device_address: str):
@@ -22,10 +247,29 @@ class RoboticGloveController:
         self.is_connected = False
         self.write_char_object = None
         self.read_char_object = None
+        # write_gatt_char bound to the write characteristic once it is resolved
+        self._send = None
+        # Data received through notifications on the read characteristic
+        self._rx_queue = asyncio.Queue()
+        self._notifying = False
+        self.mtu = DEFAULT_ATT_MTU
+        # Largest payload a single write can carry, MTU - 3
+        self._max_write = DEFAULT_ATT_MTU - 3
+        self._keepalive_task = None
+        self._last_write = 0.0
+        # Set while receive_data waits, so the keep-alive doesn't write (and draw
+        # a reply) in the middle of a command's round trip.
+        self._awaiting_response = False
+        # Held for the whole of each write, so the MTU-sized parts of one payload
+        # go out back to back instead of interleaving with pipelined writes.
+        self._write_lock = asyncio.Lock()
 
-    async def connect(self):
+    async def connect(self, notify: bool = False):
         """
         Connects to the BLE device.
+        If notify is set, subscribes to notifications on the read characteristic
+        so that receive_data doesn't have to poll; leave it unset when the
+        responses aren't read, so they don't pile up unconsumed.
         """
         if self.is_connected and self.client:
             print("Already connected.")
@@ -33,36 +277,32 @@ class RoboticGloveController:
 
         print(f"Attempting to connect to {self.device_address}...")
         try:
-            self.client = BleakClient(self.device_address)
+            # Only resolve the UART service, which WinRT and CoreBluetooth can filter
+            # on when enumerating services. On Windows, also reuse the services WinRT
+            # has cached instead of rediscovering them over the air.
+            self.client = BleakClient(self.device_address, services=[_UART_SERVICE_UUID],
+                                      winrt={"use_cached_services": True})
             await self.client.connect()
             self.is_connected = True
             print(f"Connected to {self.device_address}.")
+            await self._negotiate_link_parameters()
 
-            # Find service using UART_SERVICE_UUID
-            found_service = None
-            for service in self.client.services:
-                # Compare UUIDs case-insensitively, and handle potential 16-bit vs 128-bit forms
-                if str(service.uuid).upper() == UART_SERVICE_UUID.upper() or \
-                   (len(UART_SERVICE_UUID) == 4 and str(service.uuid).upper() == f"0000{UART_SERVICE_UUID.upper()}-0000-1000-8000-00805F9B34FB"):
-                    found_service = service
-                    print(f"Found target service: {service.uuid} (Handle: {service.handle})")
-                    break
-
+            # Look up the service and characteristics by their pre-normalized UUIDs.
+            found_service = self.client.services.get_service(_UART_SERVICE_UUID)
             if not found_service:
                 print(f"ERROR: Could not find service with UUID {UART_SERVICE_UUID}.")
                 await self.client.disconnect()
                 self.is_connected = False
                 return False
+            print(f"Found target service: {found_service.uuid} (Handle: {found_service.handle})")
 
-            # Iterate through characteristics within the found service
-            for char in found_service.characteristics:
-                if str(char.uuid).upper() == WRITE_CHARACTERISTIC_UUID.upper():
-                    self.write_char_object = char
-                    print(f"Found write characteristic object: {self.write_char_object.uuid} (Handle: {self.write_char_object.handle})")
+            self.write_char_object = found_service.get_characteristic(_WRITE_CHARACTERISTIC_UUID)
+            if self.write_char_object:
+                print(f"Found write characteristic object: {self.write_char_object.uuid} (Handle: {self.write_char_object.handle})")
 
-                if str(char.uuid).upper() == READ_CHARACTERISTIC_UUID.upper():
-                    self.read_char_object = char
-                    print(f"Found read characteristic object: {self.read_char_object.uuid} (Handle: {self.read_char_object.handle})")
+            self.read_char_object = found_service.get_characteristic(_READ_CHARACTERISTIC_UUID)
+            if self.read_char_object:
+                print(f"Found read characteristic object: {self.read_char_object.uuid} (Handle: {self.read_char_object.handle})")
 
             if self.write_char_object is None:
                 print(f"ERROR: Could not find write characteristic with UUID {WRITE_CHARACTERISTIC_UUID} "
@@ -71,6 +311,7 @@ class RoboticGloveController:
                 self.is_connected = False
                 return False
 
+            await self._setup_characteristics(notify)
             return True
 
         except Exception as e:
@@ -78,10 +319,101 @@ class RoboticGloveController:
             self.is_connected = False
             return False
 
+    async def _negotiate_link_parameters(self):
+        """
+        Reads the ATT MTU the Bluetooth stack negotiated, which bounds how many
+        batch commands can share a PDU. BlueZ exchanges the MTU on its own, but
+        bleak only learns the value through AcquireWrite/AcquireNotify, so it is
+        read explicitly there; WinRT and CoreBluetooth report it directly.
+        The connection interval cannot be set from the central through bleak or
+        BlueZ's D-Bus API; the firmware has to request a short interval itself
+        (7.5-15 ms) with a connection parameter update. Only Android lets the
+        central ask for a high-priority (short interval) connection.
+        """
+        backend = self.client._backend
+        acquire_mtu = getattr(backend, "_acquire_mtu", None)
+        if acquire_mtu is not None:
+            try:
+                await acquire_mtu()
+            except Exception as e:
+                print(f"WARNING: Could not read the negotiated MTU: {e}")
+
+        # BluetoothGatt handle of bleak's python-for-android backend
+        android_gatt = getattr(backend, "_BleakClientP4Android__gatt", None)
+        if android_gatt is not None:
+            try:
+                android_gatt.requestConnectionPriority(ANDROID_CONNECTION_PRIORITY_HIGH)
+            except Exception as e:
+                print(f"WARNING: Could not request high connection priority: {e}")
+
+        self.mtu = self.client.mtu_size
+        self._max_write = self.mtu - 3
+        print(f"ATT MTU: {self.mtu} bytes.")
+
+    async def _setup_characteristics(self, notify: bool):
+        """
+        Prepares the resolved characteristics for use: binds the writer and, if
+        notify is set, subscribes to notifications on the read characteristic
+        if it supports them.
+        """
+        # Bind the characteristic object (never its UUID string, which bleak would
+        # have to resolve on every call) to write_gatt_char once per connection.
+        self._send = functools.partial(self.client.write_gatt_char, self.write_char_object, response=False)
+
+        self._notifying = False
+        if notify and self.read_char_object and "notify" in self.read_char_object.properties:
+            try:
+                await self.client.start_notify(self.read_char_object, self._on_notify)
+                self._notifying = True
+            except Exception as e:
+                print(f"WARNING: Could not subscribe to notifications, falling back to reads: {e}")
+
+    def _on_notify(self, _sender, data: bytearray):
+        self._rx_queue.put_nowait(bytes(data))
+
+    async def __aenter__(self):
+        if not self.is_connected and not await self.connect(notify=True):
+            raise ConnectionError(f"Could not connect to BLE device {self.device_address}.")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.disconnect()
+
+    def start_keepalive(self, interval: float):
+        """
+        Writes KEEPALIVE_COMMAND whenever nothing has been sent for `interval`
+        seconds, so the link doesn't fall back to a low duty cycle between
+        commands and the next one isn't delayed by waking it up. Pauses while
+        receive_data waits for a response, so the response isn't confused with
+        a reply to the keep-alive. Runs until stop_keepalive() or disconnect().
+        """
+        self.stop_keepalive()
+        self._keepalive_task = asyncio.create_task(self._keepalive(interval))
+
+    def stop_keepalive(self):
+        if self._keepalive_task:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+
+    async def _keepalive(self, interval: float):
+        while self.is_connected:
+            if self._awaiting_response:
+                await asyncio.sleep(interval)
+                continue
+            idle = time.monotonic() - self._last_write
+            if idle < interval:
+                await asyncio.sleep(interval - idle)
+                continue
+            try:
+                await self._write(KEEPALIVE_COMMAND)
+            except Exception as e:
+                logger.debug("Keep-alive write failed: %s", e)
+
     async def disconnect(self):
         """
         Disconnects from the BLE device.
         """
+        self.stop_keepalive()
         if self.is_connected and self.client:
             try:
                 await self.client.disconnect()
@@ -92,44 +424,104 @@ class RoboticGloveController:
         else:
             print("Not connected.")
 
-    async def read_data(self):
+    async def read_data(self, as_text: bool = False):
         """
         Reads data from the read characteristic.
+        Returns the raw bytes, or the data decoded as UTF-8 if as_text is set.
         """
         if not self.is_connected or not self.read_char_object:
             print("Cannot read: Not connected or read characteristic not found.")
             return
 
         try:
-            data = await self.client.read_gatt_char(self.read_char_object)
+            data = await _retry(lambda: self.client.read_gatt_char(self.read_char_object))
             # or parse/struct unpack if needed
-            decoded = data.decode("utf-8", errors="ignore")
-            return decoded
+            return data.decode("utf-8", errors="ignore") if as_text else bytes(data)
         except Exception as e:
             print(f"Error reading from characteristic: {e}")
             return None
 
+    async def receive_data(self, timeout: float = 1.0, as_text: bool = False):
+        """
+        Waits for the next response from the device.
+        Uses notifications when subscribed, otherwise reads the read characteristic.
+        Returns the raw bytes, or the data decoded as UTF-8 if as_text is set,
+        or None if nothing arrives within the timeout.
+        """
+        self._awaiting_response = True
+        try:
+            if not self._notifying:
+                # Give the device time to respond before polling.
+                await asyncio.sleep(0.05)
+                return await self.read_data(as_text)
+
+            try:
+                data = await asyncio.wait_for(self._rx_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return None
+            return data.decode("utf-8", errors="ignore") if as_text else data
+        finally:
+            self._awaiting_response = False
+
+    def discard_received(self):
+        """
+        Drops notifications that arrived after an earlier receive_data timed out,
+        so the next receive_data returns the response to the next command.
+        """
+        while not self._rx_queue.empty():
+            self._rx_queue.get_nowait()
+
     async def _send_command(self, user_input: str):
         """
         Sends a command to the Arduino over BLE.
         """
-        if not self.is_connected or not self.client:
-            print("Not connected to BLE device. Cannot send command.")
-            return
-
         if not user_input.endswith("$"):
             user_input += "$"
 
+        await self._send_bytes(user_input.encode("utf-8"))
+
+    async def _send_bytes(self, payload: bytes):
+        """
+        Sends an encoded command to the Arduino over BLE.
+        """
+        if not self.is_connected or not self.client:
+            logger.warning("Not connected to BLE device. Cannot send command.")
+            return
+
         try:
-            # Write to the characteristic. Use write_gatt_char for sending data.
-            # 'response=True' means it expects a confirmation from the device (slower but reliable).
-            # 'response=False' means 'write without response' (faster, less reliable).
-            await self.client.write_gatt_char(self.write_char_object,
-                                              user_input.encode("utf-8"),
-                                              response=False)
+            # Write to the characteristic. _send is write_gatt_char bound with
+            # 'response=False', i.e. 'write without response' (faster, less reliable).
+            # Each MTU-sized part is retried on its own, so a retry never resends
+            # the parts already written.
+            async with self._write_lock:
+                self._last_write = time.monotonic()
+                for part in _split_payload(payload, self._max_write):
+                    await _retry(functools.partial(self._send, part))
+            logger.debug("Sent %r", payload)
 
         except Exception as e:
-            print(f"Error sending command '{user_input}' over BLE: {e}")
+            logger.error("Error sending command %r over BLE: %s", payload, e)
+
+    async def send_raw(self, payload: bytes):
+        """
+        Writes an already-encoded payload to the write characteristic.
+        No formatting or validation is done, so this is meant for hot paths
+        where commands have been built ahead of time.
+        """
+        await self._write(payload)
+
+    async def _write(self, payload: bytes):
+        # Hot path: look up the bound writer once into a local.
+        send = self._send
+        async with self._write_lock:
+            self._last_write = time.monotonic()
+            # A batch command can exceed MTU - 3 bytes on a default-MTU link.
+            limit = self._max_write
+            if len(payload) <= limit:
+                await send(payload)
+                return
+            for part in _split_payload(payload, limit):
+                await send(part)
 
     async def set_all_servos_batch(self, angles: list[int]):
         """
@@ -141,15 +533,22 @@ class RoboticGloveController:
             print(f"ERROR: set_all_servos_batch requires a list of 5 angles. Got {len(angles)}.")
             return
 
-        servo_chars = ['A', 'B', 'C', 'D', 'E']
-        command_parts = []
-        for i, angle in enumerate(angles):
-            clamped_angle = max(0, min(180, angle))
-            command_parts.append(f"{servo_chars[i]}{clamped_angle}$")
+        await self._send_bytes(self._fmt_batch(angles))
+
+    async def set_all_servos_batch_prevalidated(self, angles):
+        """
+        Fast path of set_all_servos_batch for angles that are already known to be
+        5 values within 0-180, e.g. quantized with np.clip. Accepts a list,
+        bytes, or NumPy array and does no validation or clamping.
+        """
+        await self._send_bytes(encode_batch(angles))
 
-        final_command = "".join(command_parts)
-        print(final_command)
-        await self._send_command(final_command)
+    def _fmt_batch(self, angles: list[int]) -> bytes:
+        """
+        Encodes a batch command, clamping each angle to 0-180.
+        Float angles are truncated to whole degrees.
+        """
+        return encode_batch([max(0, min(180, int(a))) for a in angles])
 
     async def set_servo_angle(self, servo_index: int, angle: int):
         """
@@ -157,7 +556,7 @@ class RoboticGloveController:
         :param servo_index: The index of the servo (0-4 for Thumb to Little).
         :param angle: The desired angle (0-180 degrees).
         """
-        if not 0 <= servo_index <= 5:
+        if servo_index not in _SERVO_INDICES:
             print(f"ERROR: Servo index {servo_index} must be between 0 and 5.")
             return
         if not 0 <= angle <= 180:
@@ -165,32 +564,66 @@ class RoboticGloveController:
             angle = max(0, min(180, angle))
 
         # The command character 'A' corresponds to servo 0, 'B' to 1, etc.
-        command_char = chr(ord('A') + servo_index)
-        # The command is the character followed by the angle, e.g., "A90" or "C180".
-        command_string = f"{command_char}{angle}"
-        await self._send_command(command_string)
+        # The command is the character followed by the angle, e.g., "A90$" or "C180$".
+        await self._send_bytes(SERVO_TOKENS[servo_index][angle])
 
     async def set_all_servos_angle(self, angle: int):
         """
         Sets all finger servos to a specific angle.
         :param angle: The desired angle (0-180 degrees).
         """
-        for i in range(5):
-            await self.set_servo_angle(i, angle)
-            print(f"Set all servos to {angle} degrees.")
+        if not 0 <= angle <= 180:
+            print(f"WARNING: Angle {angle} is outside 0-180. Clamping.")
+            angle = max(0, min(180, angle))
+
+        # One batch command ("A90$B90$...") is a single ATT PDU, instead of five
+        # PDUs each waiting for its own connection interval.
+        await self.set_all_servos_batch_prevalidated([angle] * 5)
+        print(f"Set all servos to {angle} degrees.")
 
     @staticmethod
     async def discover_devices_async(name):
         """
         Helper function for discovering devices
         """
+        device = _get_discovered(name)
+        if device:
+            print(f"Device {name} found (already discovered).")
+            return device
+
         print("Scanning for BLE devices...")
-        # Scan for 5 seconds
-        device = await BleakScanner.find_device_by_name(name, timeout=5.0)
+        # Register before starting the scanner, so an advertisement received
+        # while it starts up still wakes the wait below.
+        found = _discovery_waiters.setdefault(name, asyncio.Event())
+
+        # Wait up to 5 seconds, returning at the first advertisement that matches
+        try:
+            await _start_shared_scanner()
+            await asyncio.wait_for(found.wait(), timeout=5.0)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            _discovery_waiters.pop(name, None)
 
+        device = _get_discovered(name)
         if not device:
             print(f"No BLE device with name {name} found.")
             return
 
         print(f"Device {name} found.")
         return device
+
+    @staticmethod
+    async def stop_discovery():
+        """
+        Stops the shared scanner, e.g. once connected, so scanning doesn't compete
+        with the connection for radio time. Devices already discovered stay cached
+        until they expire, and the scanner restarts if a lookup misses.
+        """
+        global _scanner, _prune_task
+        if _prune_task is not None:
+            _prune_task.cancel()
+            _prune_task = None
+        if _scanner is not None:
+            scanner, _scanner = _scanner, None
+            await _stop_scanner(scanner)
@@ -1,37 +1,124 @@
 import asyncio
-from glove_controller import RoboticGloveController, DEVICE_ADDRESS
+import time
+from glove_controller import RoboticGloveController, DEVICE_ADDRESS, async_input, run_event_loop
+
+# Seconds of inactivity after which a keep-alive is written.
+KEEPALIVE_INTERVAL = 0.5
+# Print the average command round-trip time every this many commands.
+LATENCY_REPORT_INTERVAL = 20
+
+
+async def connect_controller(name, address):
+    """
+    Races a scan for the device by name against a direct connection to the
+    known address, so a warm start doesn't wait for the scan to time out.
+    Returns a connected controller, or None.
+    """
+    direct = RoboticGloveController(address)
+    connect_task = asyncio.create_task(direct.connect(notify=True))
+    scan_task = asyncio.create_task(RoboticGloveController.discover_devices_async(name))
+
+    async def drop_direct():
+        if not connect_task.done():
+            connect_task.cancel()
+            try:
+                await connect_task
+            except asyncio.CancelledError:
+                pass
+        # Drop a connection that may have been established, or half established
+        # when cancelled, since the direct controller isn't the one returned.
+        if direct.client:
+            try:
+                await direct.client.disconnect()
+            except Exception:
+                pass
+
+    controller = None
+    pending = {connect_task, scan_task}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            if connect_task in done and connect_task.result():
+                controller = direct
+                return controller
+
+            if scan_task in done:
+                try:
+                    device = scan_task.result()
+                except Exception as e:
+                    # Treat a failed scan as not found; the direct connection may still succeed.
+                    print(f"Scan failed: {e}")
+                    device = None
+
+                if device:
+                    # The scan found the device the direct connection is already
+                    # being made to, so let that connection finish rather than
+                    # start over.
+                    if device.address.upper() == address.upper() and await connect_task:
+                        controller = direct
+                        return controller
+
+                    await drop_direct()
+                    controller = RoboticGloveController(device)
+                    if not await controller.connect(notify=True):
+                        controller = None
+                    return controller
+
+        return None
+    finally:
+        # Don't leave either attempt running, including when one of them raised.
+        if controller is not direct:
+            await drop_direct()
+        if not scan_task.done():
+            scan_task.cancel()
+            try:
+                await scan_task
+            except asyncio.CancelledError:
+                pass
 
 
 async def main():
     print("--- Discovering BLE Devices ---")
-    device = await RoboticGloveController.discover_devices_async("Hiwonder")
+    controller = await connect_controller("Hiwonder", DEVICE_ADDRESS)
+    await RoboticGloveController.stop_discovery()
     print("\n--- Discovery Complete ---")
 
-    controller = RoboticGloveController(device) if device else RoboticGloveController(DEVICE_ADDRESS)
+    if not controller:
+        print("Could not connect to Robotic Glove. Exiting.")
+        return
 
-    if await controller.connect():
+    async with controller:
+        # Keep the link awake between commands typed by the user.
+        controller.start_keepalive(KEEPALIVE_INTERVAL)
         try:
             print("\n--- Interactive Mode ---")
             print("Type a command character and value (e.g., A90), or 'q' to quit.")
+            commands = 0
+            total_ns = 0
             while True:
-                user_input = input("Command: ").strip()
+                user_input = (await async_input("Command: ")).strip()
 
                 if user_input.lower() == 'q':
                     break
 
+                controller.discard_received()
+                start_ns = time.monotonic_ns()
                 await controller._send_command(user_input)
-
-                await asyncio.sleep(0.05)
-                message = await controller.read_data()
+                message = await controller.receive_data(as_text=True)
+                total_ns += time.monotonic_ns() - start_ns
 
                 print(f"Received (BLE): {message}")
 
+                # Report round-trip latency averaged over a batch of commands.
+                commands += 1
+                if commands == LATENCY_REPORT_INTERVAL:
+                    print(f"Average round trip: {total_ns // commands // 1000} µs over {commands} commands")
+                    commands = 0
+                    total_ns = 0
+
         except KeyboardInterrupt:
             print("\nExiting program.")
-        finally:
-            await controller.disconnect()
-    else:
-        print("Could not connect to Robotic Glove. Exiting.")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_event_loop(main())
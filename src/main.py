@@ -1,11 +1,28 @@
 import asyncio
+import queue
+import threading
+import time
+import numpy as np
 import pandas as pd
-from glove_controller import RoboticGloveController, DEVICE_ADDRESS
+from glove_controller import RoboticGloveController, DEVICE_ADDRESS, async_input, encode_batch, run_event_loop
 
 # configuration
 CSV_FILE = 'test1-copy.csv'
 SAMPLE_RATE = 1
-
+# Number of BLE writes allowed in flight at once. The replay waits for a free
+# slot before sending the next sample, so a slow link holds the replay back
+# instead of queueing stale frames behind it.
+MAX_IN_FLIGHT_WRITES = 3
+# Print a status line every this many sent samples. Printing every sample
+# blocks the event loop on stdout between BLE writes.
+STATUS_PRINT_INTERVAL = 50
+# The recording is streamed in chunks of this many samples, with at most
+# RECORDING_QUEUE_CHUNKS prepared ahead of the replay.
+RECORDING_CHUNK_SIZE = 256
+RECORDING_QUEUE_CHUNKS = 8
+
+# Rows of the CSV holding the two-level column header; data starts after them.
+HEADER_ROWS = [1, 2]
 TIME_COLUMN = ('Unnamed: 0_level_0', 'delta time (s)')
 FINGER_COLUMNS = [
     ('Glove 1 Scaled', 'Thumb'),
@@ -16,22 +33,126 @@ FINGER_COLUMNS = [
 ]
 
 
+def _iter_recording(path):
+    """
+    Reads the CSV recording in chunks and turns each one into what the replay
+    loop needs: per-sample delta times, whether each sample is sent, its
+    encoded command, and its angles. State that spans chunks (sample count,
+    last sent pose, encoded poses) is carried across chunk boundaries.
+    """
+    # Resolve the MultiIndex column names to integer positions once from the
+    # header, then parse only those columns of the data rows.
+    header = pd.read_csv(path, header=HEADER_ROWS, nrows=0).columns
+    time_pos = header.get_loc(TIME_COLUMN)
+    finger_pos = [header.get_loc(col) for col in FINGER_COLUMNS]
+    reader = pd.read_csv(path, header=None, skiprows=max(HEADER_ROWS) + 1,
+                         usecols=[time_pos, *finger_pos], chunksize=RECORDING_CHUNK_SIZE)
+
+    # Recordings repeat a small set of distinct poses, so each unique pose is
+    # encoded once for the whole recording.
+    encoded_poses = {}
+    last_sampled_pose = None
+    offset = 0
+
+    with reader:
+        for df in reader:
+            # Quantize the chunk to servo angles in one vectorized pass.
+            times = df[time_pos].to_numpy(dtype=np.float64)
+            scaled = df[finger_pos].to_numpy(dtype=np.float32)
+            angles = np.clip(scaled * 180.0, 0, 180).astype(np.int16)
+
+            unique_angles, pose_ids = np.unique(angles, axis=0, return_inverse=True)
+            pose_ids = pose_ids.reshape(-1)
+            unique_rows = unique_angles.tolist()
+
+            # Every Nth sample is sent, except where its pose is identical to the
+            # previously sent sample. Skipped samples still advance the schedule.
+            first = -offset % SAMPLE_RATE
+            sampled_ids = pose_ids[first::SAMPLE_RATE]
+            send_mask = np.zeros(len(times), dtype=bool)
+            changed = np.diff(sampled_ids, prepend=-1) != 0
+            if len(sampled_ids):
+                if unique_rows[sampled_ids[0]] == last_sampled_pose:
+                    changed[0] = False
+                last_sampled_pose = unique_rows[sampled_ids[-1]]
+            send_mask[first::SAMPLE_RATE] = changed
+            offset += len(times)
+
+            # Encode commands here instead of formatting them inside the replay loop.
+            unique_payloads = []
+            for row in unique_rows:
+                pose = tuple(row)
+                payload = encoded_poses.get(pose)
+                if payload is None:
+                    payload = encoded_poses[pose] = encode_batch(pose)
+                unique_payloads.append(payload)
+
+            # Plain Python lists are returned; indexing NumPy arrays element by
+            # element boxes a new scalar object on every access.
+            id_list = pose_ids.tolist()
+            payloads = [unique_payloads[i] for i in id_list]
+            angle_rows = [unique_rows[i] for i in id_list]
+
+            yield times.tolist(), send_mask.tolist(), payloads, angle_rows
+
+
+def _put_chunk(chunks, item, stop):
+    # Blocks while the queue is full, but gives up once the replay has stopped.
+    while not stop.is_set():
+        try:
+            chunks.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get_chunk(chunks, stop):
+    while not stop.is_set():
+        try:
+            return chunks.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return None
+
+
+def _produce_recording(path, chunks, stop):
+    """
+    Runs in a worker thread, feeding prepared chunks of the recording into the
+    queue. The end of the recording is marked with None, and an error while
+    reading is passed on to the consumer as the exception itself.
+    """
+    try:
+        for chunk in _iter_recording(path):
+            if not _put_chunk(chunks, chunk, stop):
+                return
+        end = None
+    except Exception as e:
+        end = e
+    _put_chunk(chunks, end, stop)
+
+
+async def _next_chunk(chunks, stop):
+    chunk = await asyncio.to_thread(_get_chunk, chunks, stop)
+    if isinstance(chunk, Exception):
+        raise chunk
+    return chunk
+
+
 async def main():
     """
-    Main function to load CSV data and control the glove.
+    Main function to stream CSV data and control the glove.
     """
     print(f"Loading glove recording from: {CSV_FILE}")
     print(f"Movement commands will be sent every {SAMPLE_RATE} samples.")
 
-    try:
-        df = pd.read_csv(CSV_FILE, header=[1, 2])
-    except Exception as e:
-        print(f"ERROR: Could not read or parse the CSV file: {e}")
-        return
-
-    print("CSV data loaded successfully.")
+    # Parse the recording in a thread while the glove connects.
+    chunks = queue.Queue(maxsize=RECORDING_QUEUE_CHUNKS)
+    stop = threading.Event()
+    producer = asyncio.create_task(asyncio.to_thread(_produce_recording, CSV_FILE, chunks, stop))
 
     glove = RoboticGloveController(DEVICE_ADDRESS)
+    pending_writes = set()
 
     try:
         await glove.connect()
@@ -39,38 +160,66 @@ async def main():
             print("Failed to connect to the glove. Exiting.")
             return
 
-        print("\n--- Starting Glove Replay ---")
-        input("Press Enter to begin the movement sequence...")
-
-        time_to_wait = 0.0
-        total_elapsed_time = 0.0
-
-        for index, row in df.iterrows():
-            # accumulate the time from every sample for accurate playback speed
-            delta_time = row[TIME_COLUMN]
-            time_to_wait += delta_time
-            total_elapsed_time += delta_time
-
-            # The first sample (index 0) will always be sent.
-            if index % SAMPLE_RATE == 0:
-                angles = []
-                for col_name_tuple in FINGER_COLUMNS:
-                    scaled_value = row[col_name_tuple]
-                    angle = int(scaled_value * 180)
-                    angles.append(max(0, min(180, angle)))
-
-                # Send the batch command with the angles from the current (Nth) sample
-                await glove.set_all_servos_batch(angles)
-
-                # Update and display status
-                angles_str = ", ".join(map(str, angles))
-                print(f"Time: {total_elapsed_time:6.2f}s | Angles: [{angles_str}] | Waiting: {time_to_wait:.4f}s ({SAMPLE_RATE} samples)")
+        try:
+            chunk = await _next_chunk(chunks, stop)
+        except Exception as e:
+            print(f"ERROR: Could not read or parse the CSV file: {e}")
+            return
 
-                # Wait for the accumulated time of the last N samples
-                await asyncio.sleep(time_to_wait)
+        print("CSV recording opened successfully.")
 
-                # Reset the timer for the next batch of samples
-                time_to_wait = 0.0
+        print("\n--- Starting Glove Replay ---")
+        await async_input("Press Enter to begin the movement sequence...")
+
+        write_slots = asyncio.Semaphore(MAX_IN_FLIGHT_WRITES)
+
+        async def send_sample(payload):
+            # Runs holding a slot the replay loop acquired for it.
+            try:
+                await glove.send_raw(payload)
+            except Exception as e:
+                # Report and carry on with the next sample, as a late frame is already stale.
+                print(f"Error sending {payload!r} over BLE: {e}")
+            finally:
+                write_slots.release()
+
+        # Each sample is scheduled against a monotonic deadline so that the
+        # (variable) time spent in the BLE write does not accumulate as drift.
+        t0 = time.monotonic()
+        scheduled = t0
+        sent_count = 0
+
+        while chunk is not None:
+            for delta_time, send, payload, angles in zip(*chunk):
+                # The first sample (index 0) will always be sent.
+                if send:
+                    # Sleep until the start of this sample, so the previous pose is
+                    # held through any unchanged samples skipped since. If a write
+                    # overran, don't sleep at all rather than compound the delay.
+                    await asyncio.sleep(max(0.0, scheduled - time.monotonic()))
+
+                    # Send the batch command with the angles from the current (Nth) sample
+                    # without waiting for it, so the write overlaps with the next sleep.
+                    # With every slot busy, wait for one rather than queue another task.
+                    await write_slots.acquire()
+                    write = asyncio.create_task(send_sample(payload))
+                    pending_writes.add(write)
+                    write.add_done_callback(pending_writes.discard)
+
+                    # Update and display status
+                    if sent_count % STATUS_PRINT_INTERVAL == 0:
+                        angles_str = ", ".join(map(str, angles))
+                        print(f"Time: {scheduled - t0:6.2f}s | Angles: [{angles_str}]")
+                    sent_count += 1
+
+                scheduled += delta_time
+
+            chunk = await _next_chunk(chunks, stop)
+
+        # Hold the last sent pose for the remainder of the recording, in case
+        # the trailing samples were skipped as unchanged.
+        await asyncio.sleep(max(0.0, scheduled - time.monotonic()))
+        await asyncio.gather(*pending_writes)
 
         print("\n--- Replay Finished ---")
         print("Resetting servos to open position (0 degrees).")
@@ -81,12 +230,18 @@ async def main():
     except Exception as e:
         print(f"\nAn error occurred during replay: {e}")
     finally:
+        # Let the producer thread exit instead of waiting on a full queue.
+        stop.set()
+        for write in list(pending_writes):
+            write.cancel()
         if glove and glove.is_connected:
             print("Disconnecting from glove...")
             await glove.disconnect()
+        # The producer notices the stop within one queue timeout.
+        await producer
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        run_event_loop(main())
     except KeyboardInterrupt:
         print("\nProgram terminated.")